@@ -0,0 +1,64 @@
+"""
+Embedder backend comparison: cosine parity against torch and CPU throughput.
+Texts come from storage/chunks.jsonl (falls back to built-in samples).
+Run: python -m bench.bench_embedder [--backends torch,onnx,onnx-int8] [--limit 256]
+"""
+
+import argparse
+import sys
+import time
+
+import orjson as json
+
+from src.config import CHUNKS_PATH, EMBEDDING_PARITY_MIN, INGEST_BATCH_SIZE
+from src.embedder import PARITY_SAMPLES, cosine_agreement, get_embedder
+
+
+def load_texts(limit: int):
+    if not CHUNKS_PATH.exists():
+        return PARITY_SAMPLES * (limit // len(PARITY_SAMPLES) + 1)
+    texts = []
+    with open(CHUNKS_PATH, "rb") as f:
+        for line in f:
+            texts.append(json.loads(line)["text"])
+            if len(texts) >= limit:
+                break
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+    parser.add_argument("--limit", type=int, default=256)
+    args = parser.parse_args()
+
+    texts = load_texts(args.limit)[:args.limit]
+    backends = args.backends.split(",")
+    if "torch" not in backends:
+        backends.insert(0, "torch")
+
+    results = {}
+    for backend in backends:
+        embedder = get_embedder(backend)
+        embedder.encode(texts[:INGEST_BATCH_SIZE], batch_size=INGEST_BATCH_SIZE)  # warm-up
+        start = time.perf_counter()
+        embs = embedder.encode(texts, batch_size=INGEST_BATCH_SIZE)
+        elapsed = time.perf_counter() - start
+        results[backend] = (embs, len(texts) / elapsed)
+
+    reference, torch_rate = results["torch"]
+    failed = False
+    print("=" * 60)
+    print(f"🧪 {len(texts)} texts, batch size {INGEST_BATCH_SIZE}")
+    for backend, (embs, rate) in results.items():
+        agreement = cosine_agreement(reference, embs)
+        ok = agreement.min() >= EMBEDDING_PARITY_MIN
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} {backend:<10} {rate:8.1f} texts/s ({rate / torch_rate:.2f}x)  "
+              f"cosine min {agreement.min():.4f} mean {agreement.mean():.4f}")
+    print("=" * 60)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Ingestion memory benchmark: runs a synthetic 2,000-page PDF (or DOCX)
+through the same path as /upload (iter_chunks -> PageWriter -> rebuild_index
+with dedup, embedding and Chroma) against temporary storage, and reports
+peak RSS against a ceiling.
+Run: python -m bench.bench_ingest [--pages 2000] [--format pdf|docx] [--max-rss-mb 1024]
+
+The default ceiling is 1024 MB; the embedding model and Chroma account for
+most of it. Text is never held whole, but RSS still grows slowly with
+--pages: PyPDF2 caches parsed PDF objects and dedup keeps one signature per
+canonical chunk (~+35 MB PDF / ~+8 MB DOCX from 500 to 2,000 pages).
+"""
+
+import argparse
+import random
+import resource
+import sys
+import tempfile
+import time
+import zipfile
+from itertools import groupby
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from src.config import INGEST_BATCH_SIZE
+from src.ingest import iter_chunks, rebuild_index
+from src.page_cache import PageWriter
+
+VOCAB = (
+    "receiving disclosing party shall hold confidential information strict confidence "
+    "not disclose third prior written consent except required applicable law regulation "
+    "agreement term termination notice days breach remedy indemnify liability damages "
+    "governing jurisdiction arbitration assignment successor affiliate obligation warranty "
+    "representation covenant severability waiver amendment counterpart controller processor "
+    "personal data subject supervisory authority lawful basis retention transfer safeguard"
+).split()
+
+
+def synthetic_lines(pages: int, lines_per_page: int = 40, words_per_line: int = 14):
+    """Yield (page_index, line) with varied wording so dedup does not collapse the input"""
+    rng = random.Random(0)
+    for i in range(pages):
+        for n in range(lines_per_page):
+            words = " ".join(rng.choice(VOCAB) for _ in range(words_per_line))
+            yield i, f"Page {i + 1} Section {n + 1}. {words}."
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def write_synthetic_pdf(path: Path, pages: int, lines_per_page: int = 40):
+    """Write a plain-text PDF page by page without building it in memory"""
+    offsets = []
+
+    with open(path, "wb") as f:
+        def obj(num: int, body: bytes):
+            offsets.append((num, f.tell()))
+            f.write(f"{num} 0 obj\n".encode() + body + b"\nendobj\n")
+
+        f.write(b"%PDF-1.4\n")
+        kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(pages))
+        obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        obj(2, f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+        obj(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+        for i, group in groupby(synthetic_lines(pages, lines_per_page), key=lambda x: x[0]):
+            lines = [line for _, line in group]
+            page_obj, content_obj = 4 + 2 * i, 5 + 2 * i
+            text = "".join(f"({line}) Tj T* " for line in lines)
+            stream = f"BT /F1 6 Tf 8 TL 20 800 Td {text}ET".encode()
+            obj(page_obj, (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_obj} 0 R >>"
+            ).encode())
+            obj(content_obj, f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+
+        xref_pos = f.tell()
+        total = 4 + 2 * pages
+        f.write(f"xref\n0 {total}\n0000000000 65535 f \n".encode())
+        for _, offset in sorted(offsets):
+            f.write(f"{offset:010d} 00000 n \n".encode())
+        f.write(f"trailer\n<< /Size {total} /Root 1 0 R >>\nstartxref\n{xref_pos}\n%%EOF\n".encode())
+
+
+def write_synthetic_docx(path: Path, pages: int, lines_per_page: int = 40):
+    """Write a DOCX with one paragraph per line and a page break per page, streamed into the zip"""
+    w = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", (
+            '<?xml version="1.0" encoding="UTF-8"?><Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            '</Types>'
+        ))
+        zf.writestr("_rels/.rels", (
+            '<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>'
+            '</Relationships>'
+        ))
+        with zf.open("word/document.xml", "w") as f:
+            f.write(f'<?xml version="1.0" encoding="UTF-8"?><w:document {w}><w:body>'.encode())
+            last_page = 0
+            for i, line in synthetic_lines(pages, lines_per_page):
+                if i != last_page:
+                    f.write(b'<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+                    last_page = i
+                f.write(f"<w:p><w:r><w:t>{escape(line)}</w:t></w:r></w:p>".encode())
+            f.write(b"</w:body></w:document>")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--format", choices=["pdf", "docx"], default="pdf")
+    parser.add_argument("--max-rss-mb", type=float, default=1024.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        doc_path = tmp / f"synthetic.{args.format}"
+        if args.format == "pdf":
+            write_synthetic_pdf(doc_path, args.pages)
+        else:
+            write_synthetic_docx(doc_path, args.pages)
+        size_mb = doc_path.stat().st_size / (1024 * 1024)
+        baseline = peak_rss_mb()
+
+        start = time.perf_counter()
+        with PageWriter(tmp / "pages.jsonl") as pages:
+            stats = rebuild_index(
+                iter_chunks(str(doc_path), pages=pages),
+                chroma_path=tmp / "chroma",
+                chunks_path=tmp / "chunks.jsonl",
+            )
+        elapsed = time.perf_counter() - start
+
+    peak = peak_rss_mb()
+    print("=" * 60)
+    print(f"📄 Pages: {args.pages} {args.format.upper()} ({size_mb:.1f} MB), {stats['pages']} pages indexed")
+    print(f"🧩 Chunks: {stats['num_chunks']} ({stats['deduplicated']} deduplicated) in batches of {INGEST_BATCH_SIZE}")
+    print(f"⏱️ Time: {elapsed:.2f}s ({args.pages / elapsed:.0f} pages/s)")
+    print(f"💾 Peak RSS: {peak:.1f} MB (baseline {baseline:.1f} MB, ceiling {args.max_rss_mb:.0f} MB)")
+    print("=" * 60)
+
+    if peak > args.max_rss_mb:
+        print("❌ Peak RSS above ceiling")
+        return 1
+    print("✅ Peak RSS within ceiling")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,7 @@
 from typing import List, Dict, Optional
 from groq import Groq
 import json as pyjson
+import threading
 import regex as re
 
 from .config import GROQ_API_KEY, GROQ_MODEL, MAX_RERANKED, TEMPERATURE
@@ -15,6 +16,23 @@ def chat(messages, json_mode: bool = False):
         kwargs["response_format"] = {"type": "json_object"}
     return client.chat.completions.create(model=GROQ_MODEL, messages=messages, **kwargs)
 
+def chat_stream(messages, cancel: threading.Event) -> Optional[str]:
+    """Stream a completion, stopping early (returns None) once `cancel` is set"""
+    if cancel.is_set():
+        return None
+    stream = client.chat.completions.create(
+        model=GROQ_MODEL, messages=messages, temperature=TEMPERATURE, stream=True
+    )
+    parts = []
+    try:
+        for chunk in stream:
+            if cancel.is_set():
+                return None
+            parts.append(chunk.choices[0].delta.content or "")
+    finally:
+        stream.close()
+    return "".join(parts)
+
 def is_greeting_or_casual(question: str) -> bool:
     """Detect if the query is a greeting or casual chat"""
     q = question.lower().strip()
@@ -119,8 +137,13 @@ def _context_block(selected: List[Dict]) -> str:
     
     return "\n\n".join(blocks)
 
-def answer(question: str, selected: List[Dict], history: Optional[List[Dict]] = None) -> Dict:
-    """Generate answer with citation metadata"""
+def answer(question: str, selected: List[Dict], history: Optional[List[Dict]] = None,
+           cancel: Optional[threading.Event] = None) -> Optional[Dict]:
+    """
+    Generate answer with citation metadata.
+    With `cancel`, the completion is streamed and None is returned if it is
+    cancelled before finishing.
+    """
     
     # Handle greetings
     if is_greeting_or_casual(question):
@@ -157,8 +180,13 @@ def answer(question: str, selected: List[Dict], history: Optional[List[Dict]] =
     })
 
     # Get answer from LLM
-    resp = chat(messages, json_mode=False)
-    answer_text = resp.choices[0].message.content or ""
+    if cancel is not None:
+        answer_text = chat_stream(messages, cancel)
+        if answer_text is None:
+            return None
+    else:
+        resp = chat(messages, json_mode=False)
+        answer_text = resp.choices[0].message.content or ""
     
     # Build citations for UI
     citations = []
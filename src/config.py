@@ -24,6 +24,8 @@ UPLOADS_DIR = BASE_DIR / "uploads"
 # ============================================================================
 
 CHUNKS_PATH = STORAGE_DIR / "chunks.jsonl"
+PAGES_PATH = STORAGE_DIR / "pages.jsonl"        # Per-page text for citation highlighting
+SPECULATION_LOG_PATH = STORAGE_DIR / "speculation.jsonl"  # Speculative answer hit/latency log
 CHROMA_PATH = STORAGE_DIR / "chroma"
 
 # ============================================================================
@@ -42,11 +44,48 @@ TOP_K = int(os.getenv("TOP_K", 12))           # Number of internal chunks to ret
 MAX_RERANKED = int(os.getenv("MAX_RERANKED", 6))  # Max chunks to use in answer
 TEMPERATURE = float(os.getenv("TEMPERATURE", 0))  # Generation temperature
 
+# Speculative mode: start answering from the top dense chunks while reranking runs
+SPECULATIVE_ANSWERS = os.getenv("SPECULATIVE_ANSWERS", "false").lower() == "true"
+SPECULATIVE_TOP_K = int(os.getenv("SPECULATIVE_TOP_K", 3))  # Dense chunks the speculative answer is built from (< MAX_RERANKED)
+SPECULATIVE_MIN_JACCARD = float(os.getenv("SPECULATIVE_MIN_JACCARD", 0.5))  # Min overlap of speculative and reranked ids
+
+# ============================================================================
+# INGESTION
+# ============================================================================
+
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", 800))          # Words per chunk
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", 150))    # Words shared by consecutive chunks
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 64))  # Chunks embedded/indexed per batch
+DOCX_PAGE_WORDS = int(os.getenv("DOCX_PAGE_WORDS", 500))     # Page length for DOCX files without stored page breaks
+
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"  # Near-duplicate detection at ingest
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.85))  # Estimated Jaccard similarity for a duplicate
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", 64))        # MinHash signature length
+
 # ============================================================================
 # EMBEDDING MODEL
 # ============================================================================
 
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # SentenceTransformer model
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")  # torch | onnx | onnx-int8
+EMBEDDING_MAX_SEQ_LENGTH = int(os.getenv("EMBEDDING_MAX_SEQ_LENGTH", 256))  # Tokens per text (model default)
+EMBEDDING_PARITY_MIN = float(os.getenv("EMBEDDING_PARITY_MIN", 0.99))  # Min cosine vs torch for an ONNX export
+ONNX_CACHE_DIR = STORAGE_DIR / "onnx"                # Exported ONNX models
+
+# ============================================================================
+# PROFILING
+# ============================================================================
+
+PROFILES_DIR = STORAGE_DIR / "profiles"
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "false").lower() == "true"  # Honor PROFILE_HEADER at all
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "X-Profile")              # Request header that enables profiling
+PROFILE_SECRET = os.getenv("PROFILE_SECRET", "")                       # If set, PROFILE_TOKEN_HEADER must match it
+PROFILE_TOKEN_HEADER = os.getenv("PROFILE_TOKEN_HEADER", "X-Profile-Token")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))       # Fraction of /chat and /upload requests profiled
+PROFILE_SAMPLE_MODE = os.getenv("PROFILE_SAMPLE_MODE", "cpu")           # cpu | alloc | all for sampled requests
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))       # Stack sampling interval
+PROFILE_ALLOC_FRAMES = int(os.getenv("PROFILE_ALLOC_FRAMES", 8))       # Stack depth kept per allocation
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", 50))                      # Most recent profiles kept on disk
 
 # ============================================================================
 # CREATE DIRECTORIES
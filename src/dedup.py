@@ -0,0 +1,104 @@
+# src/dedup.py
+"""
+Near-duplicate chunk detection with MinHash + LSH.
+
+Chunks are shingled into word 5-grams and reduced to a MinHash signature.
+LSH bands narrow the comparison to likely candidates; a candidate is a
+near-duplicate when the estimated Jaccard similarity reaches the threshold.
+"""
+
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.config import DEDUP_THRESHOLD, DEDUP_NUM_PERM
+
+SHINGLE_SIZE = 5
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def _shingles(text: str) -> List[str]:
+    words = text.lower().split()
+    if len(words) <= SHINGLE_SIZE:
+        return [" ".join(words)]
+    return [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+
+
+def _choose_bands(num_perm: int, threshold: float):
+    """Pick (bands, rows) whose LSH threshold (1/b)^(1/r) sits just below `threshold`"""
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+class NearDuplicateIndex:
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, num_perm: int = DEDUP_NUM_PERM, seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = _choose_bands(num_perm, threshold)
+
+        gen = np.random.RandomState(seed)
+        self._a = gen.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = gen.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+        self._buckets = [defaultdict(list) for _ in range(self.bands)]
+        self._signatures: Dict[str, np.ndarray] = {}
+
+    def signature(self, text: str) -> np.ndarray:
+        hv = np.array([zlib.crc32(s.encode("utf-8")) for s in _shingles(text)], dtype=np.uint64)
+        phv = ((hv[:, None] * self._a + self._b) % _PRIME) & _MAX_HASH
+        return phv.min(axis=0)
+
+    def _band_keys(self, sig: np.ndarray):
+        for i in range(self.bands):
+            yield i, sig[i * self.rows:(i + 1) * self.rows].tobytes()
+
+    def query(self, sig: np.ndarray) -> Optional[str]:
+        """Return the id of the most similar indexed chunk above threshold, if any"""
+        candidates = set()
+        for i, key in self._band_keys(sig):
+            candidates.update(self._buckets[i].get(key, ()))
+
+        best_id, best_sim = None, self.threshold
+        for cid in candidates:
+            sim = float(np.mean(self._signatures[cid] == sig))
+            if sim >= best_sim:
+                best_id, best_sim = cid, sim
+        return best_id
+
+    def add(self, chunk_id: str, sig: np.ndarray):
+        self._signatures[chunk_id] = sig
+        for i, key in self._band_keys(sig):
+            self._buckets[i][key].append(chunk_id)
+
+    def canonical_for(self, chunk_id: str, text: str) -> Optional[str]:
+        """
+        Return the canonical id `text` duplicates, or None after indexing it
+        as a new canonical chunk.
+        """
+        sig = self.signature(text)
+        canonical = self.query(sig)
+        if canonical is None:
+            self.add(chunk_id, sig)
+        return canonical
+
+
+def collapse_duplicates(docs: List[Dict], threshold: float = DEDUP_THRESHOLD) -> List[Dict]:
+    """Drop retrieved docs that near-duplicate an earlier (higher-ranked) doc"""
+    index = NearDuplicateIndex(threshold)
+    kept = []
+    for d in docs:
+        if index.canonical_for(d["id"], d.get("text", "")) is None:
+            kept.append(d)
+
+    if len(kept) < len(docs):
+        print(f"🧹 Collapsed {len(docs) - len(kept)} near-duplicate chunks")
+    return kept
@@ -0,0 +1,180 @@
+# src/embedder.py
+"""
+Embedding backends for EMBEDDING_MODEL, selected with EMBEDDING_BACKEND:
+
+  torch      - SentenceTransformer on PyTorch (default)
+  onnx       - ONNX Runtime on CPU
+  onnx-int8  - ONNX Runtime with dynamically int8-quantized weights
+
+The ONNX model is exported from the torch model once, checked for cosine
+agreement against it, and cached under ONNX_CACHE_DIR. After that, the ONNX
+backends run without importing torch.
+"""
+
+import inspect
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from src.config import (
+    EMBEDDING_MODEL, EMBEDDING_BACKEND, EMBEDDING_MAX_SEQ_LENGTH,
+    EMBEDDING_PARITY_MIN, ONNX_CACHE_DIR,
+)
+
+PARITY_SAMPLES = [
+    "The Receiving Party shall not disclose Confidential Information to any third party.",
+    "This Agreement shall be governed by the laws of the State of New York.",
+    "Either party may terminate this Agreement upon thirty (30) days written notice.",
+    "The controller shall notify the supervisory authority of a personal data breach without undue delay.",
+    "hello",
+]
+
+
+def cosine_agreement(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Row-wise cosine similarity between two embedding matrices"""
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+class TorchEmbedder:
+    def __init__(self, model_name: str = EMBEDDING_MODEL):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.model.max_seq_length = EMBEDDING_MAX_SEQ_LENGTH
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        return self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True)
+
+
+class OnnxEmbedder:
+    def __init__(self, model_name: str = EMBEDDING_MODEL, quantize: bool = False,
+                 cache_dir: Path = ONNX_CACHE_DIR):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = cache_dir / model_name
+        model_path = model_dir / ("model-int8.onnx" if quantize else "model.onnx")
+        if not model_path.exists():
+            export_onnx(model_name, model_dir, quantize=quantize)
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=EMBEDDING_MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(model_path), opts, providers=["CPUExecutionProvider"])
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        out = []
+        for i in range(0, len(texts), batch_size):
+            enc = self.tokenizer.encode_batch(texts[i:i + batch_size])
+            input_ids = np.array([e.ids for e in enc], dtype=np.int64)
+            mask = np.array([e.attention_mask for e in enc], dtype=np.int64)
+            hidden = self.session.run(None, {
+                "input_ids": input_ids,
+                "attention_mask": mask,
+                "token_type_ids": np.zeros_like(input_ids),
+            })[0]
+
+            # Mean pooling over real tokens, then L2-normalize (as SentenceTransformer does)
+            m = mask[..., None].astype(np.float32)
+            pooled = (hidden * m).sum(axis=1) / np.clip(m.sum(axis=1), 1e-9, None)
+            out.append(pooled / np.linalg.norm(pooled, axis=1, keepdims=True))
+        return np.vstack(out) if out else np.zeros((0, 0), dtype=np.float32)
+
+
+def export_onnx(model_name: str, model_dir: Path, quantize: bool = False):
+    """
+    Export the transformer to ONNX (and optionally int8). Each model is
+    checked for cosine parity with torch when it is created.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model_dir.mkdir(parents=True, exist_ok=True)
+    fp32_path = model_dir / "model.onnx"
+
+    if not fp32_path.exists():
+        print(f"📦 Exporting {model_name} to ONNX...")
+        st = SentenceTransformer(model_name, device="cpu")
+        st.tokenizer.save_pretrained(str(model_dir))
+
+        class _Encoder(torch.nn.Module):
+            def __init__(self, transformer):
+                super().__init__()
+                self.transformer = transformer
+
+            def forward(self, input_ids, attention_mask, token_type_ids):
+                return self.transformer(input_ids=input_ids, attention_mask=attention_mask,
+                                        token_type_ids=token_type_ids)[0]
+
+        dummy = st.tokenizer(PARITY_SAMPLES[:2], padding=True, return_tensors="pt")
+        torch.onnx.export(
+            _Encoder(st[0].auto_model).eval(),
+            (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+            str(fp32_path),
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "seq"},
+                "attention_mask": {0: "batch", 1: "seq"},
+                "token_type_ids": {0: "batch", 1: "seq"},
+                "last_hidden_state": {0: "batch", 1: "seq"},
+            },
+            opset_version=14,
+            # TorchScript exporter; newer torch defaults to dynamo, which needs onnxscript
+            **({"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}),
+        )
+        # Checked as soon as it exists, since the int8 model is derived from it
+        _check_parity(model_name, model_dir, quantize=False)
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        print("📦 Quantizing ONNX model to int8...")
+        quantize_dynamic(str(fp32_path), str(model_dir / "model-int8.onnx"), weight_type=QuantType.QInt8)
+        _check_parity(model_name, model_dir, quantize=True)
+
+
+def _check_parity(model_name: str, model_dir: Path, quantize: bool):
+    """Compare an exported model against the torch model, deleting it if they disagree"""
+    model_path = model_dir / ("model-int8.onnx" if quantize else "model.onnx")
+    reference = TorchEmbedder(model_name).encode(PARITY_SAMPLES)
+    candidate = OnnxEmbedder(model_name, quantize=quantize, cache_dir=model_dir.parent).encode(PARITY_SAMPLES)
+    agreement = cosine_agreement(reference, candidate)
+    print(f"🔬 ONNX parity ({'int8' if quantize else 'fp32'}): min cosine {agreement.min():.4f}, mean {agreement.mean():.4f}")
+
+    if agreement.min() < EMBEDDING_PARITY_MIN:
+        model_path.unlink(missing_ok=True)
+        raise RuntimeError(
+            f"ONNX export failed parity check: min cosine {agreement.min():.4f} < {EMBEDDING_PARITY_MIN}"
+        )
+
+
+_embedder = None
+
+
+def get_embedder(backend: Optional[str] = None):
+    """Return the process-wide embedder for EMBEDDING_BACKEND (or `backend`)"""
+    global _embedder
+    backend = backend or EMBEDDING_BACKEND
+
+    if backend != EMBEDDING_BACKEND:
+        return _build(backend)
+    if _embedder is None:
+        _embedder = _build(backend)
+    return _embedder
+
+
+def _build(backend: str):
+    if backend == "torch":
+        return TorchEmbedder()
+    if backend == "onnx":
+        return OnnxEmbedder(quantize=False)
+    if backend == "onnx-int8":
+        return OnnxEmbedder(quantize=True)
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend} (expected torch, onnx or onnx-int8)")
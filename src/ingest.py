@@ -0,0 +1,270 @@
+# src/ingest.py
+"""
+Format-pluggable document ingestion.
+
+Each reader is a generator yielding (page_num, text) units so a document is
+never held in memory as a whole. Units are chunked on the fly and handed on
+in fixed-size batches for embedding and indexing.
+"""
+
+import uuid
+import zipfile
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import chromadb
+import orjson as json
+import regex as re
+
+from src.config import (
+    CHUNK_SIZE, CHUNK_OVERLAP, INGEST_BATCH_SIZE, DOCX_PAGE_WORDS,
+    CHROMA_PATH, CHUNKS_PATH, DEDUP_ENABLED,
+)
+from src.dedup import NearDuplicateIndex
+from src.embedder import get_embedder
+
+
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", (text or "")).strip()
+
+# ============================================================================
+# READERS
+# ============================================================================
+
+def read_pdf(filepath: str) -> Iterator[Tuple[int, str]]:
+    """Yield (page_num, text) for each page of a PDF"""
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(filepath)
+    for page_num, page in enumerate(reader.pages, start=1):
+        yield page_num, page.extract_text() or ""
+
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_BODY, _P, _T, _TAB, _BR = _W + "body", _W + "p", _W + "t", _W + "tab", _W + "br"
+_RENDERED_BREAK = _W + "lastRenderedPageBreak"
+
+
+def _iter_docx_xml(filepath: str, events=("end",)):
+    """iterparse word/document.xml, freeing each body-level element once parsed"""
+    from lxml import etree
+
+    with zipfile.ZipFile(filepath) as zf, zf.open("word/document.xml") as xml:
+        for event, el in etree.iterparse(xml, events=events):
+            yield event, el
+            if event == "end" and el.getparent() is not None and el.getparent().tag == _BODY:
+                el.clear()
+                while el.getprevious() is not None:
+                    del el.getparent()[0]
+
+
+def _is_page_break(el) -> bool:
+    return el.tag == _RENDERED_BREAK or (el.tag == _BR and el.get(_W + "type") == "page")
+
+
+def read_docx(filepath: str) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_num, text) for each paragraph of a DOCX.
+    word/document.xml is streamed with iterparse, so only the current
+    paragraph is held in memory. DOCX has no fixed pages: page_num follows
+    the explicit and last-rendered page breaks stored by Word. A paragraph
+    that starts with a break belongs to the new page; a break after text
+    applies from the next paragraph. Files without
+    any (python-docx, LibreOffice and Google Docs exports) are paged every
+    DOCX_PAGE_WORDS words at paragraph boundaries, which a cheap first pass
+    detects.
+    """
+    has_breaks = any(_is_page_break(el) for _, el in _iter_docx_xml(filepath))
+
+    page_num = 1
+    page_words = 0
+    stack: List[List[str]] = []  # text of open paragraphs (text boxes nest them)
+    pending = 0  # breaks after text in the current paragraph, applied once it is yielded
+    last_break = None  # tag of the last page break, while no text has followed it
+    for event, el in _iter_docx_xml(filepath, events=("start", "end")):
+        if event == "start":
+            if el.tag == _P:
+                stack.append([])
+            continue
+
+        if el.tag == _T and stack:
+            stack[-1].append(el.text or "")
+            if (el.text or "").strip():
+                last_break = None
+        elif el.tag in (_TAB, _BR) and stack:
+            stack[-1].append(" ")
+        if _is_page_break(el):
+            # Word repeats a hard break as a rendered break on the new page
+            if not (el.tag == _RENDERED_BREAK and last_break == _BR):
+                if stack and "".join(stack[-1]).strip():
+                    pending += 1
+                else:
+                    page_num += 1  # paragraph starts on the new page
+            last_break = el.tag
+        elif el.tag == _P:
+            text = "".join(stack.pop())
+            yield page_num, text
+            page_words += len(text.split())
+            if has_breaks:
+                page_num, pending = page_num + pending, 0
+            elif page_words >= DOCX_PAGE_WORDS:
+                page_num, page_words = page_num + 1, 0
+
+
+READERS = {
+    "pdf": read_pdf,
+    "docx": read_docx,
+}
+
+
+def file_extension(filename: str) -> str:
+    return Path(filename).suffix[1:].lower()
+
+# ============================================================================
+# CHUNKING
+# ============================================================================
+
+def iter_chunks(filepath: str,
+                chunk_size: int = CHUNK_SIZE,
+                overlap: int = CHUNK_OVERLAP,
+                pages=None,
+                fmt: str = None) -> Iterator[Dict]:
+    """
+    Stream chunks from any supported document.
+    Words are buffered per page; a chunk is emitted as soon as the buffer
+    reaches chunk_size, keeping `overlap` words for the next one. A trailing
+    buffer made only of overlap words is dropped since the previous chunk
+    already contains it.
+    Each chunk carries char_start/char_end offsets into its page text. If a
+    `pages` sink (see PageWriter) is given, page text is streamed to it
+    unit by unit through start_page/write/end_page.
+    The reader is picked by `fmt` ("pdf", "docx"), defaulting to the file
+    extension.
+    """
+    doc_name = Path(filepath).stem
+    reader = READERS[fmt or file_extension(filepath)]
+
+    def make_chunk(words: List[str], page_num: int, char_start: int) -> Dict:
+        text = " ".join(words)
+        return {
+            "id": str(uuid.uuid4())[:8],
+            "doc_name": doc_name,
+            "page_num": page_num,
+            "text": normalize(text),
+            "section_path": f"{doc_name} - Page {page_num}",
+            "char_start": char_start,
+            "char_end": char_start + len(text)
+        }
+
+    buffer: List[str] = []
+    fresh = 0  # words in buffer not yet part of an emitted chunk
+    buffer_start = 0  # char offset of buffer[0] in the page text
+    page_started = False  # page text has been written to `pages`
+    current_page = None
+
+    for page_num, text in reader(filepath):
+        if page_num != current_page:
+            if fresh:
+                yield make_chunk(buffer, current_page, buffer_start)
+            if page_started:
+                pages.end_page()
+            buffer, fresh, buffer_start, page_started = [], 0, 0, False
+            current_page = page_num
+
+        words = text.split()
+        if not words:
+            continue
+        if pages is not None:
+            if not page_started:
+                pages.start_page(page_num)
+            pages.write((" " if page_started else "") + " ".join(words))
+            page_started = True
+
+        buffer.extend(words)
+        fresh += len(words)
+        while len(buffer) >= chunk_size:
+            yield make_chunk(buffer[:chunk_size], page_num, buffer_start)
+            buffer_start += sum(len(w) + 1 for w in buffer[:chunk_size - overlap])
+            buffer = buffer[chunk_size - overlap:]
+            fresh = max(0, len(buffer) - overlap)
+
+    if fresh:
+        yield make_chunk(buffer, current_page, buffer_start)
+    if page_started:
+        pages.end_page()
+
+
+def batched(items: Iterable, size: int = INGEST_BATCH_SIZE) -> Iterator[List]:
+    """Group an iterable into lists of at most `size` items"""
+    it = iter(items)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+# ============================================================================
+# INDEXING
+# ============================================================================
+
+def rebuild_index(chunks: Iterable[Dict], chroma_path: Path = CHROMA_PATH,
+                  chunks_path: Path = CHUNKS_PATH) -> Dict:
+    """
+    Rebuild ChromaDB index and chunks.jsonl from a chunk stream.
+    Chunks are embedded and indexed in fixed-size batches so memory stays
+    bounded regardless of document size. Near-duplicates are kept in
+    chunks.jsonl as references (`duplicate_of`) to a canonical chunk and are
+    not embedded.
+    """
+    client = chromadb.PersistentClient(path=str(chroma_path))
+    
+    # Delete old collection
+    try:
+        client.delete_collection("legal_documents")
+    except:
+        pass
+    
+    # Create new collection
+    collection = client.create_collection("legal_documents")
+    embedder = get_embedder()
+    
+    print(f"📚 Indexing in batches of {INGEST_BATCH_SIZE}...")
+    
+    dedup = NearDuplicateIndex() if DEDUP_ENABLED else None
+    num_chunks = 0
+    num_deduplicated = 0
+    num_pages = 0
+    chunks_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(chunks_path, "wb") as f:
+        for batch in batched(chunks, INGEST_BATCH_SIZE):
+            unique = []
+            for c in batch:
+                canonical = dedup.canonical_for(c["id"], c["text"]) if dedup else None
+                if canonical:
+                    c["duplicate_of"] = canonical
+                else:
+                    unique.append(c)
+            
+            if unique:
+                texts = [c["text"] for c in unique]
+                embs = embedder.encode(texts, batch_size=INGEST_BATCH_SIZE).tolist()
+                collection.add(
+                    ids=[c["id"] for c in unique],
+                    embeddings=embs,
+                    documents=texts,
+                    metadatas=[{
+                        "section": c.get("section_path", "ROOT"),
+                        "page_num": c.get("page_num", 1),
+                        "doc_name": c.get("doc_name", "Unknown")
+                    } for c in unique]
+                )
+            for c in batch:
+                f.write(json.dumps(c) + b"\n")
+            
+            num_chunks += len(batch)
+            num_deduplicated += len(batch) - len(unique)
+            num_pages = max(num_pages, max(c.get("page_num", 1) for c in batch))
+    
+    print(f"✅ Index built with {num_chunks - num_deduplicated} chunks ({num_deduplicated} near-duplicates deduplicated)")
+    return {"num_chunks": num_chunks, "deduplicated": num_deduplicated, "pages": num_pages}
@@ -0,0 +1,108 @@
+# src/page_cache.py
+"""
+Per-page text and chunk passage offsets captured at extraction time, so the
+viewer can highlight a cited chunk without re-reading the document.
+
+pages.jsonl holds one {"page_num", "text"} line per page. Only byte offsets
+into it are kept in memory; a lookup is one seek + one line read.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import orjson as json
+
+from src.config import PAGES_PATH, CHUNKS_PATH
+
+
+class PageWriter:
+    """
+    Page text sink for iter_chunks(pages=...). Text is streamed into the
+    JSON line as it arrives, so a page is never held in memory whole.
+    The previous pages.jsonl is only replaced if pages were written and no
+    error occurred.
+    """
+
+    def __init__(self, path: Path = PAGES_PATH):
+        self.path = path
+        self._tmp_path = path.with_suffix(".tmp")
+        self._f = None
+        self.num_pages = 0
+
+    def __enter__(self):
+        self._f = open(self._tmp_path, "wb")
+        return self
+
+    def start_page(self, page_num: int):
+        self._f.write(b'{"page_num":' + json.dumps(page_num) + b',"text":"')
+
+    def write(self, text: str):
+        self._f.write(json.dumps(text)[1:-1])  # JSON-escaped, without quotes
+
+    def end_page(self):
+        self._f.write(b'"}\n')
+        self.num_pages += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        self._f.close()
+        if exc_type is None and self.num_pages:
+            self._tmp_path.replace(self.path)
+        else:
+            self._tmp_path.unlink(missing_ok=True)
+
+
+class PageCache:
+    def __init__(self, pages_path: Path = PAGES_PATH, chunks_path: Path = CHUNKS_PATH):
+        self.pages_path = pages_path
+        self._page_offsets: Dict[int, int] = {}
+        self._passages: Dict[str, Dict] = {}
+        self._duplicates: Dict[str, List[Dict]] = {}  # canonical id -> chunks deduplicated into it
+
+        if pages_path.exists():
+            with open(pages_path, "rb") as f:
+                offset = f.tell()
+                for line in iter(f.readline, b""):
+                    self._page_offsets[json.loads(line)["page_num"]] = offset
+                    offset = f.tell()
+
+        if chunks_path.exists():
+            with open(chunks_path, "rb") as f:
+                for line in f:
+                    c = json.loads(line)
+                    if "duplicate_of" in c:
+                        self._duplicates.setdefault(c["duplicate_of"], []).append(
+                            {"id": c["id"], "page_num": c.get("page_num", 1)}
+                        )
+                    if "char_start" not in c:
+                        continue
+                    self._passages[c["id"]] = {
+                        "doc_name": c.get("doc_name", "Unknown"),
+                        "page_num": c.get("page_num", 1),
+                        "start": c["char_start"],
+                        "end": c["char_end"],
+                    }
+
+        print(f"🗂️ Page cache: {len(self._page_offsets)} pages, {len(self._passages)} passages")
+
+    def page_text(self, page_num: int) -> Optional[str]:
+        offset = self._page_offsets.get(page_num)
+        if offset is None:
+            return None
+        with open(self.pages_path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())["text"]
+
+    def passage(self, chunk_id: str) -> Optional[Dict]:
+        """
+        Return page text and the chunk's char offsets within it, plus the
+        near-duplicate chunks (other pages) that were deduplicated into it
+        """
+        p = self._passages.get(chunk_id)
+        if p is None:
+            return None
+        return {
+            "id": chunk_id,
+            **p,
+            "page_text": self.page_text(p["page_num"]) or "",
+            "duplicates": self._duplicates.get(chunk_id, []),
+        }
@@ -0,0 +1,261 @@
+# src/profiler.py
+"""
+On-demand per-request profiling for the chat and upload paths.
+
+A request is profiled when it is sampled at PROFILE_SAMPLE_RATE or, with
+PROFILE_ENABLED set, when it sends the PROFILE_HEADER header (plus a
+PROFILE_TOKEN_HEADER matching PROFILE_SECRET, if one is configured). The
+header value picks what is captured: "cpu", "alloc", or "all"/"1"/"true"
+for both; any other value is ignored. Sampled requests use
+PROFILE_SAMPLE_MODE.
+
+For "cpu", a background thread samples the request thread's stack every
+PROFILE_INTERVAL_MS. For "alloc", tracemalloc traces allocations, which
+slows the request several-fold and skews CPU samples taken at the same
+time. A watcher thread polls traced memory at the same interval and
+snapshots it whenever it reaches a new high, so the profile shows what was
+live at the request's peak (relative to a snapshot at the start), not only
+what survived the request. Spikes shorter than the interval can be missed.
+tracemalloc traces every thread, so allocations of concurrent requests
+show up in the same profile; profile allocations on a quiet server.
+
+Results are written to PROFILES_DIR in collapsed-stack format
+(`frame;frame;frame value` per line), which flamegraph.pl and speedscope
+read directly:
+
+  <id>.cpu.folded    stack samples
+  <id>.alloc.folded  bytes allocated since the request started, at its peak, by stack
+  <id>.json          summary metadata
+
+Unprofiled requests only pay for a header lookup and a float comparison.
+"""
+
+import functools
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+
+import orjson as json
+from flask import request, make_response
+
+from src.config import (
+    PROFILES_DIR, PROFILE_ENABLED, PROFILE_HEADER, PROFILE_SECRET, PROFILE_TOKEN_HEADER,
+    PROFILE_SAMPLE_RATE, PROFILE_SAMPLE_MODE, PROFILE_INTERVAL_MS, PROFILE_ALLOC_FRAMES,
+    PROFILE_KEEP,
+)
+
+_HEADER_MODES = {"cpu": "cpu", "alloc": "alloc", "all": "all", "1": "all", "true": "all"}
+_PEAK_STEP_BYTES = 256 * 1024  # growth over the last snapshot before taking a new one
+
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval into collapsed stacks"""
+
+    def __init__(self, thread_id: int, interval_s: float):
+        super().__init__(daemon=True, name="profile-sampler")
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _take_snapshot():
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ])
+
+
+class PeakSnapshotter(threading.Thread):
+    """Keeps the tracemalloc snapshot taken closest to the traced-memory peak"""
+
+    def __init__(self, interval_s: float):
+        super().__init__(daemon=True, name="profile-alloc")
+        self.interval_s = interval_s
+        self.baseline_bytes = tracemalloc.get_traced_memory()[0]
+        self.baseline = _take_snapshot()
+        self.peak = self.baseline
+        self.peak_bytes = self.baseline_bytes
+        self._stop_event = threading.Event()
+
+    def _poll(self):
+        current, _ = tracemalloc.get_traced_memory()
+        if current > self.peak_bytes + _PEAK_STEP_BYTES:
+            self.peak = _take_snapshot()
+            self.peak_bytes = current
+
+    def run(self):
+        while not self._stop_event.wait(self.interval_s):
+            self._poll()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self._poll()
+
+
+def _start_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0:
+            tracemalloc.start(PROFILE_ALLOC_FRAMES)
+        _tracemalloc_users += 1
+
+
+def _stop_tracemalloc():
+    """Stop tracing (other profiled requests share the tracer, so it may stay on)"""
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+
+
+def authorized() -> bool:
+    """Whether the request may trigger or read profiles (PROFILE_ENABLED, plus PROFILE_SECRET if set)"""
+    if not PROFILE_ENABLED:
+        return False
+    if PROFILE_SECRET:
+        token = request.headers.get(PROFILE_TOKEN_HEADER, "")
+        return hmac.compare_digest(token.encode(), PROFILE_SECRET.encode())
+    return True
+
+
+def _header_mode() -> Optional[str]:
+    """Mode requested via PROFILE_HEADER, if profiling on request is enabled and authorized"""
+    mode = _HEADER_MODES.get(request.headers.get(PROFILE_HEADER, "").strip().lower())
+    return mode if mode and authorized() else None
+
+
+def _profile_mode() -> Optional[str]:
+    """Return "cpu", "alloc", "all", or None when the request is not profiled"""
+    mode = _header_mode()
+    if mode:
+        return mode
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return PROFILE_SAMPLE_MODE
+    return None
+
+
+def profiled(view):
+    """Decorate a Flask view so selected requests are profiled"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        mode = _profile_mode()
+        if mode is None:
+            return view(*args, **kwargs)
+        return _run_profiled(view, args, kwargs, mode)
+    return wrapper
+
+
+def _run_profiled(view, args, kwargs, mode: str):
+    profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint}-{uuid.uuid4().hex[:6]}"
+    sampler = StackSampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000) if mode != "alloc" else None
+    allocs = None
+
+    if mode != "cpu":
+        _start_tracemalloc()
+        allocs = PeakSnapshotter(PROFILE_INTERVAL_MS / 1000)
+        allocs.start()
+    if sampler:
+        sampler.start()
+    start = time.perf_counter()
+    try:
+        response = view(*args, **kwargs)
+    finally:
+        duration = time.perf_counter() - start
+        if sampler:
+            sampler.stop()
+        if allocs:
+            allocs.stop()
+            _stop_tracemalloc()
+        _write_profile(profile_id, mode, duration, sampler.stacks if sampler else None, allocs)
+
+    print(f"🔬 Profiled {request.endpoint} in {duration * 1000:.0f}ms -> {profile_id}")
+    response = make_response(response)
+    response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+def _write_profile(profile_id: str, mode: str, duration: float,
+                   stacks: Optional[Counter], allocs: Optional[PeakSnapshotter]):
+    PROFILES_DIR.mkdir(parents=True, exist_ok=True)
+    meta = {
+        "id": profile_id,
+        "endpoint": request.endpoint,
+        "mode": mode,
+        "created": time.time(),
+        "duration_ms": round(duration * 1000, 1),
+        "files": [],
+    }
+
+    if stacks is not None:
+        with open(PROFILES_DIR / f"{profile_id}.cpu.folded", "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        meta["files"].append(f"{profile_id}.cpu.folded")
+        meta["cpu_samples"] = sum(stacks.values())
+        meta["interval_ms"] = PROFILE_INTERVAL_MS
+
+    if allocs is not None:
+        # Growth from the request's start to its peak, by allocating stack
+        total = 0
+        with open(PROFILES_DIR / f"{profile_id}.alloc.folded", "w") as f:
+            for stat in allocs.peak.compare_to(allocs.baseline, "traceback"):
+                if stat.size_diff <= 0:
+                    continue
+                total += stat.size_diff
+                frames = ";".join(f"{os.path.basename(fr.filename)}:{fr.lineno}" for fr in stat.traceback)
+                f.write(f"{frames} {stat.size_diff}\n")
+        meta["files"].append(f"{profile_id}.alloc.folded")
+        meta["alloc_peak_bytes"] = total
+
+    with open(PROFILES_DIR / f"{profile_id}.json", "wb") as f:
+        f.write(json.dumps(meta))
+
+    _prune()
+
+
+def _prune():
+    """Keep only the PROFILE_KEEP most recent profiles"""
+    metas = sorted(PROFILES_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for meta in metas[PROFILE_KEEP:]:
+        profile_id = meta.name[:-len(".json")]
+        for suffix in (".json", ".cpu.folded", ".alloc.folded"):
+            (PROFILES_DIR / f"{profile_id}{suffix}").unlink(missing_ok=True)
+
+
+def list_profiles() -> List[Dict]:
+    """Metadata of stored profiles, newest first"""
+    if not PROFILES_DIR.exists():
+        return []
+    metas = sorted(PROFILES_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    return [json.loads(meta.read_bytes()) for meta in metas]
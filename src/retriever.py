@@ -1,20 +1,21 @@
 # src/retriever.py
 import chromadb
 import requests
-from sentence_transformers import SentenceTransformer
 from typing import List, Dict
-from src.config import STORAGE_DIR, TOP_K, YOU_API_KEY
+from src.config import STORAGE_DIR, TOP_K, YOU_API_KEY, DEDUP_ENABLED
+from src.dedup import collapse_duplicates
+from src.embedder import get_embedder
 
 class ChromaRetriever:
     def __init__(self):
         chroma_path = str(STORAGE_DIR / "chroma")
         self.client = chromadb.PersistentClient(path=chroma_path)
         self.collection = self.client.get_or_create_collection("legal_documents")
-        self.embedder = SentenceTransformer("all-MiniLM-L6-v2")
+        self.embedder = get_embedder()
 
     def retrieve(self, query: str, k: int = TOP_K):
         """Retrieve from internal ChromaDB with citation metadata"""
-        emb = self.embedder.encode(query).tolist()
+        emb = self.embedder.encode([query])[0].tolist()
         results = self.collection.query(query_embeddings=[emb], n_results=k)
         docs = []
         
@@ -92,8 +93,10 @@ def hybrid_retrieve(query: str, retriever: ChromaRetriever, k_internal: int = 6,
     # 2. Get external You.com results
     external_docs = you_search(query, k_external)
     
-    # 3. Combine and return
+    # 3. Combine, collapse near-duplicates and return
     combined = internal_docs + external_docs
+    if DEDUP_ENABLED:
+        combined = collapse_duplicates(combined)
     
     print(f"ðŸ” Hybrid Retrieval: {len(internal_docs)} internal + {len(external_docs)} external = {len(combined)} total")
     
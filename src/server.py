@@ -3,114 +3,44 @@ warnings.filterwarnings("ignore", category=UserWarning, module="urllib3")
 
 from flask import Flask, request, jsonify, render_template, send_from_directory
 from werkzeug.utils import secure_filename
-import os
-import orjson as json
 from pathlib import Path
-from PyPDF2 import PdfReader
-import uuid
-import regex as re
-import chromadb
-from sentence_transformers import SentenceTransformer
+from itertools import chain
 
 from src.agent import rerank_chunks, answer
+from src.speculative import speculative_answer, stats as speculation_stats
+from src.page_cache import PageCache, PageWriter
+from src.profiler import profiled, list_profiles, authorized as profiles_authorized
+from src.ingest import READERS, iter_chunks, rebuild_index, file_extension
 from src.retriever import ChromaRetriever, hybrid_retrieve
-from src.config import TOP_K, STORAGE_DIR, UPLOADS_DIR, CHUNKS_PATH, CHROMA_PATH
+from src.config import TOP_K, STORAGE_DIR, UPLOADS_DIR, SPECULATIVE_ANSWERS, PROFILES_DIR
 
 app = Flask(__name__, template_folder="../templates")
 
-ALLOWED_EXTENSIONS = {'pdf'}
+ALLOWED_EXTENSIONS = set(READERS)
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max
 
 # Global state
 retriever = None
 current_document = None
+page_cache = None
 
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
-def normalize(text: str) -> str:
-    return re.sub(r"\s+", " ", (text or "")).strip()
-
-def process_pdf(filepath):
-    """Extract text from PDF with page-level metadata"""
-    doc_name = Path(filepath).stem
-    
-    try:
-        reader = PdfReader(filepath)
-        chunks = []
-        
-        for page_num, page in enumerate(reader.pages, start=1):
-            page_text = page.extract_text()
-            if not page_text.strip():
-                continue
-            
-            # Split page into smaller chunks
-            words = page_text.split()
-            chunk_size = 800
-            overlap = 150
-            
-            for i in range(0, len(words), chunk_size - overlap):
-                chunk_text = " ".join(words[i:i + chunk_size])
-                if not chunk_text.strip():
-                    continue
-                
-                chunks.append({
-                    "id": str(uuid.uuid4())[:8],
-                    "doc_name": doc_name,
-                    "page_num": page_num,
-                    "text": normalize(chunk_text),
-                    "section_path": f"{doc_name} - Page {page_num}"
-                })
-        
-        return chunks
-    except Exception as e:
-        print(f"❌ Error processing PDF: {e}")
-        return []
-
-def rebuild_index(chunks):
-    """Rebuild ChromaDB index with new chunks"""
-    chroma_path = str(CHROMA_PATH)
-    client = chromadb.PersistentClient(path=chroma_path)
-    
-    # Delete old collection
-    try:
-        client.delete_collection("legal_documents")
-    except:
-        pass
-    
-    # Create new collection
-    collection = client.create_collection("legal_documents")
-    embedder = SentenceTransformer("all-MiniLM-L6-v2")
-    
-    print(f"📚 Indexing {len(chunks)} chunks...")
-    
-    for c in chunks:
-        emb = embedder.encode(c["text"]).tolist()
-        collection.add(
-            ids=[c["id"]],
-            embeddings=[emb],
-            documents=[c["text"]],
-            metadatas=[{
-                "section": c.get("section_path", "ROOT"),
-                "page_num": c.get("page_num", 1),
-                "doc_name": c.get("doc_name", "Unknown")
-            }]
-        )
-    
-    print(f"✅ Index built with {len(chunks)} chunks")
+    return file_extension(filename) in ALLOWED_EXTENSIONS
 
 @app.route("/health", methods=["GET"])
 def health():
     return jsonify({
         "ok": True, 
         "current_doc": current_document,
-        "has_retriever": retriever is not None
+        "has_retriever": retriever is not None,
+        "speculation": speculation_stats.summary()
     })
 
 @app.route("/upload", methods=["POST"])
+@profiled
 def upload_file():
-    """Handle PDF upload and process it dynamically"""
-    global current_document, retriever
+    """Handle document upload (PDF/DOCX) and process it dynamically"""
+    global current_document, retriever, page_cache
     
     if 'file' not in request.files:
         return jsonify({"error": "No file provided"}), 400
@@ -120,43 +50,44 @@ def upload_file():
         return jsonify({"error": "No file selected"}), 400
     
     if not allowed_file(file.filename):
-        return jsonify({"error": "Only PDF files allowed"}), 400
+        return jsonify({"error": "Only PDF and DOCX files allowed"}), 400
     
     try:
-        filename = secure_filename(file.filename)
+        # secure_filename drops non-ASCII characters, which can take the
+        # extension with it ("договор.pdf" -> "pdf"), so keep it separately
+        fmt = file_extension(file.filename)
+        filename = f"{secure_filename(Path(file.filename).stem) or 'document'}.{fmt}"
         filepath = UPLOADS_DIR / filename
         file.save(str(filepath))
         
         print(f"📄 Processing: {filename}")
         
-        chunks = process_pdf(str(filepath))
-        
-        if not chunks:
-            return jsonify({"error": "Failed to extract text from PDF"}), 500
-        
-        STORAGE_DIR.mkdir(exist_ok=True)
-        with open(CHUNKS_PATH, "wb") as f:
-            for chunk in chunks:
-                f.write(json.dumps(chunk) + b"\n")
-        
-        print(f"💾 Saved {len(chunks)} chunks")
+        with PageWriter() as pages:
+            chunks = iter_chunks(str(filepath), pages=pages, fmt=fmt)
+            first = next(chunks, None)
+            
+            if first is None:
+                return jsonify({"error": "Failed to extract text from document"}), 500
+            
+            stats = rebuild_index(chain([first], chunks))
+        print(f"💾 Saved {stats['num_chunks']} chunks")
         
-        rebuild_index(chunks)
         retriever = ChromaRetriever()
-        
-        num_pages = max([c.get("page_num", 1) for c in chunks])
+        page_cache = PageCache()
         
         current_document = {
             "filename": filename,
             "path": str(filepath),
-            "num_chunks": len(chunks),
-            "pages": num_pages
+            "format": fmt,
+            "num_chunks": stats["num_chunks"],
+            "deduplicated": stats["deduplicated"],
+            "pages": stats["pages"]
         }
         
         return jsonify({
             "success": True,
             "document": current_document,
-            "message": f"✅ Processed {len(chunks)} chunks from {filename} ({num_pages} pages)"
+            "message": f"✅ Processed {stats['num_chunks']} chunks from {filename} ({stats['pages']} pages, {stats['deduplicated']} near-duplicates deduplicated)"
         })
         
     except Exception as e:
@@ -165,10 +96,28 @@ def upload_file():
 
 @app.route("/pdf/<filename>")
 def serve_pdf(filename):
-    """Serve uploaded PDF for viewing in UI"""
+    """
+    Serve uploaded PDF for viewing in UI.
+    Flask already answers Range (206) and ETag/If-None-Match (304) requests
+    here, with Cache-Control: no-cache so a re-uploaded file is never stale.
+    """
     return send_from_directory(str(UPLOADS_DIR), filename)
 
+@app.route("/passage/<chunk_id>")
+def passage(chunk_id):
+    """Return cached page text and char offsets of a chunk for citation highlighting"""
+    global page_cache
+    
+    if page_cache is None:
+        page_cache = PageCache()
+    
+    result = page_cache.passage(chunk_id)
+    if result is None:
+        return jsonify({"error": f"Unknown chunk: {chunk_id}"}), 404
+    return jsonify(result)
+
 @app.route("/chat", methods=["POST"])
+@profiled
 def chat_endpoint():
     """Handle chat queries with HYBRID support (doc + web)"""
     global retriever, current_document
@@ -176,6 +125,8 @@ def chat_endpoint():
     data = request.get_json(force=True)
     question = (data.get("question") or "").strip()
     history = data.get("history", [])
+    speculative = data.get("speculative")
+    speculative = SPECULATIVE_ANSWERS if speculative is None else str(speculative).lower() == "true"
 
     if not question:
         return jsonify({"error": "Question is required"}), 400
@@ -193,13 +144,17 @@ def chat_endpoint():
         
         print(f"📊 Retrieved {len(retrieved)} total chunks")
         
-        # Rerank chunks
-        selected = rerank_chunks(question, retrieved)
-        
-        print(f"✅ Selected {len(selected)} chunks for answer")
-        
-        # Generate answer with citations
-        result = answer(question, selected, history=history)
+        if speculative:
+            # Answer from top dense chunks while reranking runs
+            result = speculative_answer(question, retrieved, history=history)
+        else:
+            # Rerank chunks
+            selected = rerank_chunks(question, retrieved)
+            
+            print(f"✅ Selected {len(selected)} chunks for answer")
+            
+            # Generate answer with citations
+            result = answer(question, selected, history=history)
         
         # Add current document info if available
         if current_document:
@@ -213,6 +168,22 @@ def chat_endpoint():
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+@app.route("/profiles", methods=["GET"])
+def profiles():
+    """List recent request profiles (newest first)"""
+    if not profiles_authorized():
+        return jsonify({"error": "Profiling is not enabled or the profile token is invalid"}), 403
+    return jsonify(list_profiles())
+
+@app.route("/profiles/<filename>", methods=["GET"])
+def profile_file(filename):
+    """Fetch a profile file (collapsed stacks, flamegraph-ready, or its JSON summary)"""
+    if not profiles_authorized():
+        return jsonify({"error": "Profiling is not enabled or the profile token is invalid"}), 403
+    if filename.endswith(".folded"):
+        return send_from_directory(str(PROFILES_DIR), filename, mimetype="text/plain")
+    return send_from_directory(str(PROFILES_DIR), filename)
+
 @app.route("/", methods=["GET"])
 def home():
     return render_template("legal_rag.html")
@@ -0,0 +1,125 @@
+# src/speculative.py
+"""
+Speculative answer generation overlapped with reranking.
+
+While `rerank_chunks` runs, an answer is already being streamed from the top
+SPECULATIVE_TOP_K dense-retrieval chunks, a smaller pool than the reranker
+picks from. The answer is kept only if the reranker selected every one of
+those chunks (so nothing it rejected is cited) and the two id sets overlap by
+at least SPECULATIVE_MIN_JACCARD; otherwise it is cancelled and regenerated
+from the reranked chunks. Every request is logged so hit rate and
+latency saved can be reviewed before enabling the mode by default.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import orjson as json
+
+from src.agent import rerank_chunks, answer, is_greeting_or_casual, handle_greeting
+from src.config import SPECULATIVE_TOP_K, SPECULATIVE_MIN_JACCARD, SPECULATION_LOG_PATH
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="speculative")
+
+
+class SpeculationStats:
+    """In-process hit/latency counters, mirrored to SPECULATION_LOG_PATH"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hits = 0
+        self.saved_ms = 0.0
+
+    def record(self, entry: Dict):
+        with self._lock:
+            self.requests += 1
+            self.hits += int(entry["hit"])
+            self.saved_ms += entry["saved_ms"]
+            with open(SPECULATION_LOG_PATH, "ab") as f:
+                f.write(json.dumps(entry) + b"\n")
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.requests, 3) if self.requests else None,
+                "avg_saved_ms": round(self.saved_ms / self.requests, 1) if self.requests else None,
+            }
+
+
+stats = SpeculationStats()
+
+
+def _timed_answer(question: str, context: List[Dict], history: Optional[List[Dict]], cancel: threading.Event):
+    """Answer from `context`, returning (result, start time, generation seconds)"""
+    start = time.perf_counter()
+    result = answer(question, context, history=history, cancel=cancel)
+    return result, start, time.perf_counter() - start
+
+
+def speculative_answer(question: str, retrieved: List[Dict], history: Optional[List[Dict]] = None) -> Dict:
+    """Rerank and answer like the serial pipeline, overlapping the two LLM calls when possible"""
+    if is_greeting_or_casual(question):
+        return handle_greeting(question)
+
+    context = [c for c in retrieved if c.get("source_type") != "external"][:SPECULATIVE_TOP_K]
+    if not context:
+        return answer(question, rerank_chunks(question, retrieved), history=history)
+
+    start = time.perf_counter()
+    cancel = threading.Event()
+    future = _executor.submit(_timed_answer, question, context, history, cancel)
+
+    try:
+        selected = rerank_chunks(question, retrieved)
+    except BaseException:
+        cancel.set()
+        future.cancel()
+        raise
+    rerank_s = time.perf_counter() - start
+
+    context_ids = {c["id"] for c in context}
+    chosen_ids = {c["id"] for c in selected}
+    jaccard = len(chosen_ids & context_ids) / len(chosen_ids | context_ids)
+    hit = context_ids <= chosen_ids and jaccard >= SPECULATIVE_MIN_JACCARD
+
+    # A job still waiting for a worker has saved nothing; answering here is faster
+    queued = future.cancel()
+    result = None
+    queue_s = generation_s = 0.0
+    if hit and not queued:
+        try:
+            result, worker_start, generation_s = future.result()
+            queue_s = worker_start - start
+        except Exception as e:
+            print(f"⚠️ Speculative answer failed: {e}, regenerating")
+        hit = result is not None
+    else:
+        hit = False
+        cancel.set()
+
+    if hit:
+        # Serial pipeline would have run the same generation after reranking;
+        # negative when queueing for a worker made speculation slower
+        saved_s = rerank_s + generation_s - (time.perf_counter() - start)
+    else:
+        result = answer(question, selected, history=history)
+        saved_s = 0.0
+
+    print(f"🔮 Speculation {'hit' if hit else 'miss'} (jaccard {jaccard:.2f}, saved {saved_s * 1000:.0f}ms)")
+    stats.record({
+        "ts": time.time(),
+        "hit": hit,
+        "jaccard": round(jaccard, 3),
+        "queued": queued,
+        "queue_ms": round(queue_s * 1000, 1),
+        "rerank_ms": round(rerank_s * 1000, 1),
+        "saved_ms": round(saved_s * 1000, 1),
+        "total_ms": round((time.perf_counter() - start) * 1000, 1),
+    })
+    result["speculative"] = hit
+    return result
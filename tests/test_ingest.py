@@ -0,0 +1,47 @@
+import zipfile
+
+import pytest
+
+from src.ingest import read_docx
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+RENDERED = "<w:lastRenderedPageBreak/>"
+HARD = '<w:br w:type="page"/>'
+
+
+def para(*runs):
+    return "<w:p>" + "".join(f"<w:r>{r}</w:r>" for r in runs) + "</w:p>"
+
+
+def text(t):
+    return f"<w:t>{t}</w:t>"
+
+
+@pytest.fixture
+def make_docx(tmp_path):
+    def make(*paragraphs):
+        path = tmp_path / "doc.docx"
+        with zipfile.ZipFile(path, "w") as zf:
+            zf.writestr("word/document.xml", f"<w:document {W}><w:body>{''.join(paragraphs)}</w:body></w:document>")
+        return str(path)
+    return make
+
+
+def test_rendered_break_at_paragraph_start_belongs_to_new_page(make_docx):
+    path = make_docx(para(text("a")), para(RENDERED + text("x")), para(text("b")))
+    assert list(read_docx(path)) == [(1, "a"), (2, "x"), (2, "b")]
+
+
+def test_break_after_text_applies_to_next_paragraph(make_docx):
+    path = make_docx(para(text("a"), HARD), para(text("b")))
+    assert list(read_docx(path)) == [(1, "a "), (2, "b")]
+
+
+def test_hard_break_then_rendered_break_counts_once(make_docx):
+    path = make_docx(para(text("a"), HARD), para(RENDERED + text("b")), para(text("c")))
+    assert list(read_docx(path)) == [(1, "a "), (2, "b"), (2, "c")]
+
+
+def test_hard_break_before_text_counts_once(make_docx):
+    path = make_docx(para(text("a")), para(HARD, RENDERED + text("b")), para(HARD + text("c")))
+    assert list(read_docx(path)) == [(1, "a"), (2, " b"), (3, " c")]